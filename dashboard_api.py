@@ -13,6 +13,7 @@ import magic
 import psutil
 import jwt
 import re
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, asdict
@@ -47,7 +48,7 @@ import sys
 sys.path.append('.')
 # Safely import AI service with fallback
 try:
-    from ai_service import EnhancedAIService, UserProfile, process_fit_feedback_with_dashboard, DashboardResponse
+    from ai_service import EnhancedAIService, UserProfile, process_fit_feedback_with_dashboard, DashboardResponse, get_ai_service
     AI_SERVICE_AVAILABLE = True
 except ImportError as e:
     logging.warning(f"AI Service not available: {e}")
@@ -66,6 +67,9 @@ except ImportError as e:
             return {}
     
     EnhancedAIService = MockAIService
+    
+    def get_ai_service(load_models=True):
+        return MockAIService()
     UserProfile = dict
 
 # =====================================
@@ -1201,7 +1205,8 @@ logging.basicConfig(
 
 # Initialize enhanced AI service with fallback
 try:
-    ai_service = EnhancedAIService()
+    # Models load in the background from initialize_application, not at import time
+    ai_service = get_ai_service(load_models=False)
     if hasattr(ai_service, 'enable_dashboard_mode'):
         ai_service.enable_dashboard_mode()
     logging.info("AI service initialized successfully")
@@ -2707,6 +2712,8 @@ def initialize_application():
                 logging.info("Initializing enhanced AI service...")
                 if hasattr(ai_service, 'enable_dashboard_mode'):
                     ai_service.enable_dashboard_mode()
+                # Load or train models off the request path; requests never wait on it
+                threading.Thread(target=get_ai_service, name="ai-service-warmup", daemon=True).start()
                 logging.info("AI service initialized successfully")
             except Exception as e:
                 logging.warning(f"AI service initialization failed: {e}")
@@ -1695,6 +1695,30 @@ BEGIN
     WHERE dashboard_created = TRUE;
 END //
 
+-- 28. Bulk Autofill History (one call per profile, runs in the caller's transaction)
+CREATE PROCEDURE sp_autofill_garments_bulk(
+    IN p_profile_id INT,
+    IN p_garments JSON
+)
+BEGIN
+    INSERT INTO autofill_history
+    (profile_id, garment_id, autofill_method, confidence_score,
+     measures_filled, measures_manual_override, version_info)
+    SELECT
+        p_profile_id, jt.garment_id, jt.autofill_method, jt.confidence_score,
+        jt.measures_filled, jt.measures_manual_override, jt.version_info
+    FROM JSON_TABLE(
+        p_garments, '$[*]' COLUMNS (
+            garment_id INT PATH '$.garment_id',
+            autofill_method VARCHAR(20) PATH '$.autofill_method',
+            confidence_score DECIMAL(4,3) PATH '$.confidence_score',
+            measures_filled INT PATH '$.measures_filled',
+            measures_manual_override INT PATH '$.measures_manual_override',
+            version_info VARCHAR(100) PATH '$.version_info'
+        )
+    ) AS jt;
+END //
+
 DELIMITER ;
 
 -- ============================================================
@@ -3867,6 +3891,30 @@ BEGIN
     WHERE dashboard_created = TRUE;
 END //
 
+-- 28. Bulk Autofill History (one call per profile, runs in the caller's transaction)
+CREATE PROCEDURE sp_autofill_garments_bulk(
+    IN p_profile_id INT,
+    IN p_garments JSON
+)
+BEGIN
+    INSERT INTO autofill_history
+    (profile_id, garment_id, autofill_method, confidence_score,
+     measures_filled, measures_manual_override, version_info)
+    SELECT
+        p_profile_id, jt.garment_id, jt.autofill_method, jt.confidence_score,
+        jt.measures_filled, jt.measures_manual_override, jt.version_info
+    FROM JSON_TABLE(
+        p_garments, '$[*]' COLUMNS (
+            garment_id INT PATH '$.garment_id',
+            autofill_method VARCHAR(20) PATH '$.autofill_method',
+            confidence_score DECIMAL(4,3) PATH '$.confidence_score',
+            measures_filled INT PATH '$.measures_filled',
+            measures_manual_override INT PATH '$.measures_manual_override',
+            version_info VARCHAR(100) PATH '$.version_info'
+        )
+    ) AS jt;
+END //
+
 DELIMITER ;
 
 -- ============================================================